@@ -10,6 +10,25 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 5
+
+# Elements returned for each reading by READ?/FETCH? (see FORM:ELEM)
+READING_ELEMENTS = "VOLT,CURR,RES,TIME,STAT"
+NUM_READING_ELEMENTS = 5
+OVERFLOW_VALUE = 9.9e37  # Instrument reports 9.91e37 for quantities that were not measured
+COMPLIANCE_BIT = 1 << 3  # Status word bit 3: source is in real compliance
+
+# Pulsed / fast-sweep settings
+PULSE_NPLC = 0.01  # Shortest integration time, keeps the measurement window small
+PULSE_CONVERSIONS = 2  # Voltage and current A/D conversions per reading (R is computed)
+MEASURE_OVERHEAD = 0.001  # Approximate trigger model overhead per reading (s)
+DEFAULT_NPLC = 1
+SOURCE_LIST_SIZE = 100  # Source memory list holds at most 100 values
+ESB_BIT = 1 << 5  # Status byte bit 5: event summary, set by *OPC once the sweep is done
+OPC_POLL_INTERVAL = 0.05  # Seconds between status byte polls while pulsing
+
+# Columns stored per reading in self.data, selectable as plot axes
+PLOT_COLUMNS = {"Time": 0, "Source": 1, "Voltage": 2, "Current": 3, "Resistance": 4, "Status": 5}
+
 class Keithley2400Controller:
     def __init__(self, root):
         self.root = root
@@ -25,10 +44,12 @@ class Keithley2400Controller:
         self.measuring = False
         self.measurement_thread = None
         self.data = []
+        self.data_mode = None  # Measurement mode self.data was acquired in
         self.start_time = None
         self.save_file_path = None
         self.csv_file = None
         self.csv_writer = None
+        self.pulse_settings = None  # (pulse width, duty cycle) selected for the last pulsed run
         
         # Create GUI
         self.create_gui()
@@ -80,12 +101,12 @@ class Keithley2400Controller:
         self.mode_var = tk.StringVar(value="voltage")
         mode_radio1 = ttk.Radiobutton(mode_frame, text="Source Current, Measure Voltage", 
                                      variable=self.mode_var, value="voltage", 
-                                     command=self.update_sequence_labels)
+                                     command=self.on_mode_change)
         mode_radio1.pack(anchor=tk.W, padx=5)
         
         mode_radio2 = ttk.Radiobutton(mode_frame, text="Source Voltage, Measure Current", 
                                      variable=self.mode_var, value="current",
-                                     command=self.update_sequence_labels)
+                                     command=self.on_mode_change)
         mode_radio2.pack(anchor=tk.W, padx=5)
         
         # Sequence input frame
@@ -152,6 +173,30 @@ class Keithley2400Controller:
         self.interval_entry.pack(padx=5, pady=2)
         self.interval_entry.insert(0, "0.1")
         
+        # Pulsed / fast-sweep settings
+        pulse_frame = ttk.LabelFrame(seq_frame, text="Pulsed / Fast Sweep")
+        pulse_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.pulsed_var = tk.BooleanVar(value=False)
+        self.pulsed_check = ttk.Checkbutton(pulse_frame, text="Pulsed mode (output off between points)", 
+                                          variable=self.pulsed_var)
+        self.pulsed_check.grid(row=0, column=0, columnspan=4, sticky=tk.W, padx=5, pady=2)
+        
+        ttk.Label(pulse_frame, text="Pulse width (s):").grid(row=1, column=0, sticky=tk.W, padx=(5, 5))
+        self.pulse_width_entry = ttk.Entry(pulse_frame, width=10)
+        self.pulse_width_entry.grid(row=1, column=1, padx=(0, 10), pady=2)
+        self.pulse_width_entry.insert(0, "0.005")
+        
+        ttk.Label(pulse_frame, text="Duty cycle (%):").grid(row=1, column=2, sticky=tk.W, padx=(0, 5))
+        self.duty_cycle_entry = ttk.Entry(pulse_frame, width=8)
+        self.duty_cycle_entry.grid(row=1, column=3, padx=(0, 10), pady=2)
+        self.duty_cycle_entry.insert(0, "10")
+        
+        ttk.Label(pulse_frame, text="Measure range (blank = compliance):").grid(row=2, column=0, columnspan=2, 
+                                                                          sticky=tk.W, padx=(5, 5))
+        self.sense_range_entry = ttk.Entry(pulse_frame, width=10)
+        self.sense_range_entry.grid(row=2, column=2, columnspan=2, sticky=tk.W, pady=2)
+        
         # File save settings
         file_frame = ttk.Frame(seq_frame)
         file_frame.pack(fill=tk.X, pady=(10, 0))
@@ -203,6 +248,30 @@ class Keithley2400Controller:
     
     def create_plot(self, parent):
         """Create the plot area"""
+        # Axis selection: any stored column can be plotted against any other
+        axis_frame = ttk.LabelFrame(parent, text="Plot Axes")
+        axis_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        columns = list(PLOT_COLUMNS)
+        self.plot_axis_combos = []
+        for row, name in enumerate(["Top plot", "Bottom plot"]):
+            ttk.Label(axis_frame, text=f"{name}  X:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+            x_combo = ttk.Combobox(axis_frame, values=columns, state="readonly", width=12)
+            x_combo.grid(row=row, column=1, padx=(0, 10), pady=2)
+            
+            ttk.Label(axis_frame, text="Y:").grid(row=row, column=2, sticky=tk.W, padx=(0, 5), pady=2)
+            y_combo = ttk.Combobox(axis_frame, values=columns, state="readonly", width=12)
+            y_combo.grid(row=row, column=3, padx=(0, 10), pady=2)
+            
+            x_combo.bind("<<ComboboxSelected>>", lambda event: self.update_plot())
+            y_combo.bind("<<ComboboxSelected>>", lambda event: self.update_plot())
+            self.plot_axis_combos.append((x_combo, y_combo))
+        
+        self.compliance_label = ttk.Label(axis_frame, text="Compliance: 0 points")
+        self.compliance_label.grid(row=0, column=4, rowspan=2, padx=5)
+        
+        self.set_default_plot_axes()
+        
         self.fig, (self.ax1, self.ax2) = plt.subplots(2, 1, figsize=(8, 8))
         self.fig.tight_layout(pad=3.0)
         
@@ -220,6 +289,31 @@ class Keithley2400Controller:
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
     
+    def set_default_plot_axes(self):
+        """Select the measured quantity vs time and vs source for the current mode"""
+        measured = "Voltage" if self.mode_var.get() == "voltage" else "Current"
+        (x1, y1), (x2, y2) = self.plot_axis_combos
+        x1.set("Time")
+        y1.set(measured)
+        x2.set("Source")
+        y2.set(measured)
+    
+    def on_mode_change(self):
+        """Handle switching between measurement modes"""
+        self.update_sequence_labels()
+        # Keep the user's axis choice while acquired data is shown
+        if not self.data:
+            self.set_default_plot_axes()
+    
+    def column_labels(self, mode):
+        """Labels of the measured columns stored in self.data for the given mode
+        
+        Each entry of self.data additionally carries the duty cycle derived from
+        the reading period of pulsed runs (NaN for DC runs) as its last element.
+        """
+        source_label = "Source Current (A)" if mode == "voltage" else "Source Voltage (V)"
+        return ['Time (s)', source_label, 'Voltage (V)', 'Current (A)', 'Resistance (Ohm)', 'Status']
+    
     def log_message(self, message):
         """Add message to log"""
         timestamp = datetime.now().strftime("%H:%M:%S")
@@ -250,6 +344,9 @@ class Keithley2400Controller:
             self.instrument.write("SENS:FUNC 'CURR'")  # Default to current measurement
             self.instrument.write("SENS:CURR:PROT 0.1")  # Set current compliance to 100mA
             self.instrument.write("SENS:VOLT:PROT 20")  # Set voltage compliance to 20V
+            self.instrument.write("SENS:FUNC:CONC ON")  # Measure several functions per reading
+            self.instrument.write("SENS:RES:MODE MAN")  # Resistance computed as V/I
+            self.instrument.write(f"FORM:ELEM {READING_ELEMENTS}")  # Data elements per reading
             self.instrument.write("OUTP ON")  # Turn output on
             
             self.connected = True
@@ -365,19 +462,24 @@ class Keithley2400Controller:
         
         try:
             # Check if file exists to determine if we need to write headers
-            file_exists = os.path.exists(file_path)
+            file_exists = os.path.exists(file_path) and os.path.getsize(file_path) > 0
+            headers = self.csv_headers(mode)
+            
+            # Only append to files with the same columns
+            if file_exists:
+                with open(file_path, newline='', encoding='utf-8') as existing_file:
+                    existing_headers = next(csv.reader(existing_file), [])
+                if existing_headers != headers:
+                    messagebox.showerror("Error", "Existing file has different columns, "
+                                         "please choose a new file for this measurement")
+                    return False
             
             # Open file in append mode
             self.csv_file = open(file_path, 'a', newline='', encoding='utf-8')
             self.csv_writer = csv.writer(self.csv_file)
             
             # Write headers only if file is new or empty
-            if not file_exists or os.path.getsize(file_path) == 0:
-                if mode == "voltage":
-                    headers = ['Timestamp', 'Time (s)', 'Current (A)', 'Voltage (V)', 'Mode']
-                else:
-                    headers = ['Timestamp', 'Time (s)', 'Voltage (V)', 'Current (A)', 'Mode']
-                
+            if not file_exists:
                 self.csv_writer.writerow(headers)
                 self.csv_file.flush()
                 self.log_message(f"Created new file: {file_path}")
@@ -400,22 +502,40 @@ class Keithley2400Controller:
         except Exception as e:
             self.log_message(f"Error closing file: {str(e)}")
     
-    def write_data_realtime(self, elapsed_time, source_val, measured_val, mode):
+    def write_data_realtime(self, reading, mode):
         """Write data point to file in real-time"""
         if not self.realtime_save_var.get() or not self.csv_writer:
             return
         
         try:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]  # Include milliseconds
-            mode_str = "I->V" if mode == "voltage" else "V->I"
-            
-            row = [timestamp, elapsed_time, source_val, measured_val, mode_str]
-            self.csv_writer.writerow(row)
+            self.csv_writer.writerow(self.csv_row(reading, mode))
             self.csv_file.flush()  # Ensure data is written immediately
             
         except Exception as e:
             self.log_message(f"Error writing to file: {str(e)}")
 
+    def csv_headers(self, mode):
+        """CSV header shared by real-time saving and export"""
+        return (['Timestamp'] + self.column_labels(mode) + 
+                ['Compliance', 'Mode', 'Pulse Width (s)', 'Duty Cycle (%)', 'Measured Duty Cycle (%)'])
+    
+    def csv_row(self, reading, mode):
+        """CSV row matching csv_headers for one entry of self.data"""
+        sample_time = datetime.fromtimestamp(self.start_time + reading[0])
+        timestamp = sample_time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]  # Include milliseconds
+        mode_str = "I->V" if mode == "voltage" else "V->I"
+        compliance = int(self.compliance_flags(reading[5]))
+        measured_duty = '' if np.isnan(reading[6]) else reading[6]
+        
+        return ([timestamp] + list(reading[:6]) + [compliance, mode_str] + 
+                self.pulse_columns() + [measured_duty])
+    
+    def pulse_columns(self):
+        """Pulse width and duty cycle recorded with each row, empty for DC runs"""
+        if self.pulse_settings is None:
+            return ['', '']
+        return list(self.pulse_settings)
+
     def disconnect_instrument(self):
         """Disconnect from the instrument"""
         try:
@@ -431,6 +551,22 @@ class Keithley2400Controller:
         except Exception as e:
             self.log_message(f"Disconnect error: {str(e)}")
     
+    def parse_readings(self, response):
+        """Parse a READ?/FETCH? response into an array with one row per reading
+        
+        Columns follow READING_ELEMENTS; quantities the instrument did not
+        measure are returned as NaN.
+        """
+        values = np.array([float(x) for x in response.strip().split(',')])
+        readings = values.reshape(-1, NUM_READING_ELEMENTS)
+        measured = readings[:, :3]
+        measured[np.abs(measured) >= OVERFLOW_VALUE] = np.nan
+        return readings
+    
+    def compliance_flags(self, status):
+        """True where the status word (scalar or array) has the compliance bit set"""
+        return (np.asarray(status).astype(int) & COMPLIANCE_BIT) != 0
+    
     def parse_source_values(self):
         """Parse source values from text input"""
         text = self.source_entry.get(1.0, tk.END).strip()
@@ -456,15 +592,52 @@ class Keithley2400Controller:
                 messagebox.showerror("Error", "No valid source values entered")
                 return
             
-            duration = float(self.duration_entry.get())
-            interval = float(self.interval_entry.get())
-            
-            if duration <= 0 or interval <= 0:
-                messagebox.showerror("Error", "Duration and interval must be positive")
+            if self.measurement_thread and self.measurement_thread.is_alive():
+                messagebox.showerror("Error", "Previous measurement is still stopping")
                 return
             
-            # Setup real-time saving
             mode = self.mode_var.get()
+            
+            # Pulsed runs ignore duration and interval
+            pulsed = self.pulsed_var.get()
+            if pulsed:
+                pulse_width = float(self.pulse_width_entry.get())
+                duty_cycle = float(self.duty_cycle_entry.get())
+                
+                if pulse_width <= 0:
+                    messagebox.showerror("Error", "Pulse width must be positive")
+                    return
+                if not 0 < duty_cycle <= 100:
+                    messagebox.showerror("Error", "Duty cycle must be between 0 and 100 %")
+                    return
+                
+                # The pulse must cover the A/D conversions of the reading
+                line_freq = float(self.instrument.query("SYST:LFR?"))
+                window = PULSE_CONVERSIONS * PULSE_NPLC / line_freq + MEASURE_OVERHEAD
+                if pulse_width <= window:
+                    messagebox.showerror("Error", f"Pulse width must be longer than the measurement "
+                                         f"window ({window:.2g} s)")
+                    return
+                source_delay = pulse_width - window
+                
+                # Default to the compliance level so no reading overranges
+                sense_range = self.sense_range_entry.get().strip()
+                if sense_range:
+                    sense_range = float(sense_range)
+                    if sense_range <= 0:
+                        messagebox.showerror("Error", "Measure range must be positive")
+                        return
+                else:
+                    sense_range = 20 if mode == "voltage" else 0.1
+            else:
+                duration = float(self.duration_entry.get())
+                interval = float(self.interval_entry.get())
+                
+                if duration <= 0 or interval <= 0:
+                    messagebox.showerror("Error", "Duration and interval must be positive")
+                    return
+            
+            # Setup real-time saving
             if not self.setup_realtime_save(mode):
                 return
             
@@ -472,27 +645,39 @@ class Keithley2400Controller:
             self.start_btn.config(state=tk.DISABLED)
             self.stop_btn.config(state=tk.NORMAL)
             self.data = []
+            self.data_mode = mode
+            self.pulse_settings = (pulse_width, duty_cycle) if pulsed else None
             self.start_time = time.time()
             
             # Configure instrument based on mode
+            self.instrument.write("SENS:FUNC:ON 'VOLT','CURR','RES'")  # Capture V, I and R together
             if mode == "voltage":
                 self.instrument.write("SOUR:FUNC CURR")
                 self.instrument.write("SENS:FUNC 'VOLT'")
                 self.instrument.write("SENS:VOLT:PROT 20")  # Set voltage compliance
-                self.instrument.write("OUTP ON")  # Turn output on
                 self.log_message("Mode: Source Current, Measure Voltage")
             else:
                 self.instrument.write("SOUR:FUNC VOLT")
                 self.instrument.write("SENS:FUNC 'CURR'")
                 self.instrument.write("SENS:CURR:PROT 0.1")  # Set current compliance
-                self.instrument.write("OUTP ON")  # Turn output on
                 self.log_message("Mode: Source Voltage, Measure Current")
             
             # Start measurement thread
-            self.measurement_thread = threading.Thread(
-                target=self.measurement_worker,
-                args=(source_values, duration, interval, mode)
-            )
+            if pulsed:
+                # Output is switched by the pulsed worker
+                unit = "V" if mode == "voltage" else "A"
+                self.log_message(f"Pulsed: width = {pulse_width} s, duty cycle = {duty_cycle} %, "
+                                 f"measure range = {sense_range} {unit}")
+                self.measurement_thread = threading.Thread(
+                    target=self.pulsed_measurement_worker,
+                    args=(source_values, mode, pulse_width, duty_cycle, source_delay, sense_range)
+                )
+            else:
+                self.instrument.write("OUTP ON")  # Turn output on
+                self.measurement_thread = threading.Thread(
+                    target=self.measurement_worker,
+                    args=(source_values, duration, interval, mode)
+                )
             self.measurement_thread.daemon = True
             self.measurement_thread.start()
             
@@ -520,21 +705,15 @@ class Keithley2400Controller:
                 while (time.time() - point_start) < duration and self.measuring:
                     try:
                         # Read measurement
-                        measurement = self.instrument.query("READ?").strip()
-                        values = [float(x) for x in measurement.split(',')]
+                        measurement = self.instrument.query("READ?")
+                        voltage, current, resistance, _, status = self.parse_readings(measurement)[0]
                         
                         elapsed_time = time.time() - self.start_time
                         
-                        if mode == "voltage":
-                            measured_val = values[0]  # Voltage reading
-                            self.data.append((elapsed_time, source_val, measured_val, "V"))
-                            # Write to file in real-time
-                            self.write_data_realtime(elapsed_time, source_val, measured_val, mode)
-                        else:
-                            measured_val = values[1]  # Current reading  
-                            self.data.append((elapsed_time, source_val, measured_val, "A"))
-                            # Write to file in real-time
-                            self.write_data_realtime(elapsed_time, source_val, measured_val, mode)
+                        reading = (elapsed_time, source_val, voltage, current, resistance, int(status), np.nan)
+                        self.data.append(reading)
+                        # Write to file in real-time
+                        self.write_data_realtime(reading, mode)
                         
                         # Update plot in main thread
                         self.root.after(0, self.update_plot)
@@ -551,53 +730,165 @@ class Keithley2400Controller:
             self.log_message(f"Measurement thread error: {str(e)}")
             self.root.after(0, self.measurement_complete)
     
+    def pulsed_measurement_worker(self, source_values, mode, pulse_width, duty_cycle,
+                                  source_delay, sense_range):
+        """Worker thread for pulsed / fast-sweep measurements
+        
+        Each point is applied only for the pulse width: the source delay plus
+        the estimated measurement window, measured on the fixed sense_range.
+        Below 100 % duty cycle SOUR:CLE:AUTO turns the output off after every
+        reading and the trigger delay sets the off time; at 100 % the output
+        stays on for a fast sweep. Points are sourced from the source memory
+        list and read back in bulk from the trace buffer, SOURCE_LIST_SIZE
+        points at a time.
+        """
+        source_func = "CURR" if mode == "voltage" else "VOLT"
+        sense_func = "VOLT" if mode == "voltage" else "CURR"
+        auto_clear = duty_cycle < 100
+        
+        try:
+            off_time = pulse_width * (100.0 / duty_cycle - 1)
+            
+            self.instrument.write("OUTP OFF")
+            self.instrument.write("SYST:AZER OFF")  # No auto-zero between readings
+            self.instrument.write(f"SENS:VOLT:NPLC {PULSE_NPLC}")  # Applies to all functions
+            # Fixed ranges so auto-ranging does not stretch the pulses
+            self.instrument.write(f"SENS:{sense_func}:RANG {sense_range}")
+            self.instrument.write(f"SOUR:{source_func}:RANG {max(abs(v) for v in source_values)}")
+            self.instrument.write(f"SOUR:{source_func}:MODE LIST")
+            self.instrument.write(f"SOUR:DEL {source_delay}")  # Settling before the reading
+            self.instrument.write(f"TRIG:DEL {off_time}")  # Off time before the next pulse
+            self.instrument.write("TRAC:FEED SENS")
+            if auto_clear:
+                self.instrument.write("SOUR:CLE:AUTO ON")  # Output off after each reading
+            else:
+                self.instrument.write("OUTP ON")
+            
+            for first in range(0, len(source_values), SOURCE_LIST_SIZE):
+                if not self.measuring:
+                    break
+                
+                chunk = source_values[first:first + SOURCE_LIST_SIZE]
+                self.log_message(f"Points {first+1}-{first+len(chunk)}/{len(source_values)}: pulsing")
+                
+                self.instrument.write(f"SOUR:LIST:{source_func} " + ",".join(str(v) for v in chunk))
+                self.instrument.write(f"TRIG:COUN {len(chunk)}")
+                self.instrument.write("TRAC:CLE")
+                self.instrument.write(f"TRAC:POIN {len(chunk)}")
+                self.instrument.write("TRAC:FEED:CONT NEXT")
+                self.instrument.write("*CLS")
+                self.instrument.write("*ESE 1")  # Report operation complete in the status byte
+                
+                chunk_time = time.time() - self.start_time
+                self.instrument.write("INIT")
+                self.instrument.write("*OPC")
+                
+                # Poll instead of blocking so Stop can abort the sweep
+                aborted = False
+                while not int(self.instrument.query("*STB?")) & ESB_BIT:
+                    if not self.measuring:
+                        self.instrument.write("ABOR")
+                        self.instrument.write("OUTP OFF")
+                        self.log_message("Pulsed sweep aborted")
+                        aborted = True
+                        break
+                    time.sleep(OPC_POLL_INTERVAL)
+                
+                # Keep the readings of an aborted chunk, the device was already pulsed
+                if aborted and int(float(self.instrument.query("TRAC:POIN:ACT?"))) == 0:
+                    break
+                readings = self.parse_readings(self.instrument.query("TRAC:DATA?"))
+                
+                # Duty cycle implied by the reading period (pulse width / period)
+                if len(readings) > 1:
+                    period = np.mean(np.diff(readings[:, 3]))
+                    measured_duty = 100.0 * min(pulse_width / period, 1.0)
+                else:
+                    measured_duty = np.nan
+                
+                # Buffer timestamps are relative to the first reading, which follows
+                # the trigger delay and source delay after INIT
+                first_reading_time = chunk_time + off_time + source_delay
+                for source_val, (voltage, current, resistance, timestamp, status) in zip(chunk, readings):
+                    reading = (first_reading_time + timestamp, source_val, voltage, current, resistance, 
+                               int(status), measured_duty)
+                    self.data.append(reading)
+                    # Write to file in real-time
+                    self.write_data_realtime(reading, mode)
+                
+                if aborted:
+                    self.root.after(0, self.update_plot)
+                    break
+                
+                # Update plot in main thread
+                self.root.after(0, self.update_plot)
+            
+        except Exception as e:
+            self.log_message(f"Measurement thread error: {str(e)}")
+        
+        # Restore settings before Start is enabled again
+        self.restore_dc_settings(source_func, sense_func)
+        
+        # Measurement complete
+        self.root.after(0, self.measurement_complete)
+    
+    def restore_dc_settings(self, source_func, sense_func):
+        """Undo the pulsed-mode configuration, leaving the output off"""
+        try:
+            self.instrument.write("OUTP OFF")
+            self.instrument.write("TRAC:FEED:CONT NEV")
+            self.instrument.write("SOUR:CLE:AUTO OFF")
+            self.instrument.write("TRIG:COUN 1")
+            self.instrument.write("TRIG:DEL 0")
+            self.instrument.write("SOUR:DEL:AUTO ON")
+            self.instrument.write(f"SOUR:{source_func}:MODE FIX")
+            self.instrument.write(f"SOUR:{source_func}:RANG:AUTO ON")
+            self.instrument.write(f"SENS:{sense_func}:RANG:AUTO ON")
+            self.instrument.write(f"SENS:VOLT:NPLC {DEFAULT_NPLC}")
+            self.instrument.write("SYST:AZER ON")
+            self.instrument.write("*ESE 0")
+        except Exception as e:
+            self.log_message(f"Error restoring settings: {str(e)}")
+    
     def update_plot(self):
         """Update the plots with current data"""
         if not self.data:
             return
         
-        times = [d[0] for d in self.data]
-        source_vals = [d[1] for d in self.data]
-        measured_vals = [d[2] for d in self.data]
-        
-        # Clear and update time plot
-        self.ax1.clear()
-        self.ax1.plot(times, measured_vals, 'b.-', markersize=3)
-        self.ax1.set_xlabel('Time (s)')
-        
-        mode = self.mode_var.get()
-        if mode == "voltage":
-            self.ax1.set_ylabel('Voltage (V)')
-            self.ax1.set_title('Voltage vs Time')
-        else:
-            self.ax1.set_ylabel('Current (A)')
-            self.ax1.set_title('Current vs Time')
-        
-        self.ax1.grid(True)
+        data = np.array(self.data, dtype=float)
         
-        # Clear and update I-V plot
-        self.ax2.clear()
-        self.ax2.plot(source_vals, measured_vals, 'r.-', markersize=3)
+        # Flag every reading taken while the source was in compliance
+        in_compliance = self.compliance_flags(data[:, 5])
+        self.compliance_label.config(text=f"Compliance: {np.count_nonzero(in_compliance)} points",
+                                     foreground="red" if in_compliance.any() else "black")
         
-        if mode == "voltage":
-            self.ax2.set_xlabel('Current (A)')
-            self.ax2.set_ylabel('Voltage (V)')
-            self.ax2.set_title('I-V Characteristic')
-        else:
-            self.ax2.set_xlabel('Voltage (V)')
-            self.ax2.set_ylabel('Current (A)')
-            self.ax2.set_title('V-I Characteristic')
-        
-        self.ax2.grid(True)
+        labels = self.column_labels(self.data_mode)
+        axes = [(self.ax1, 'b.-'), (self.ax2, 'r.-')]
+        for (ax, style), (x_combo, y_combo) in zip(axes, self.plot_axis_combos):
+            x_col = PLOT_COLUMNS[x_combo.get()]
+            y_col = PLOT_COLUMNS[y_combo.get()]
+            
+            ax.clear()
+            ax.plot(data[:, x_col], data[:, y_col], style, markersize=3)
+            if in_compliance.any():
+                ax.plot(data[in_compliance, x_col], data[in_compliance, y_col], 'kx',
+                        markersize=6, label='Compliance')
+                ax.legend(loc='best')
+            
+            ax.set_xlabel(labels[x_col])
+            ax.set_ylabel(labels[y_col])
+            ax.set_title(f"{y_combo.get()} vs {x_combo.get()}")
+            ax.grid(True)
         
         self.canvas.draw()
     
     def stop_measurement(self):
         """Stop the current measurement"""
         self.measuring = False
-        # Close real-time save file
-        self.close_realtime_save()
-        self.measurement_complete()
+        self.stop_btn.config(state=tk.DISABLED)
+        self.log_message("Stopping measurement...")
+        # The worker thread calls measurement_complete once it has finished
+        # with the instrument, which enables Start again
     
     def measurement_complete(self):
         """Called when measurement is complete"""
@@ -624,6 +915,8 @@ class Keithley2400Controller:
         self.ax2.set_title('I-V Characteristic')
         self.ax2.grid(True)
         
+        self.compliance_label.config(text="Compliance: 0 points", foreground="black")
+        
         self.canvas.draw()
         self.log_message("Data cleared")
     
@@ -646,15 +939,10 @@ class Keithley2400Controller:
             
             with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
-                mode = self.mode_var.get()
-                
-                if mode == "voltage":
-                    writer.writerow(['Time (s)', 'Current (A)', 'Voltage (V)'])
-                else:
-                    writer.writerow(['Time (s)', 'Voltage (V)', 'Current (A)'])
+                writer.writerow(self.csv_headers(self.data_mode))
                 
-                for row in self.data:
-                    writer.writerow([row[0], row[1], row[2]])
+                for reading in self.data:
+                    writer.writerow(self.csv_row(reading, self.data_mode))
             
             self.log_message(f"Data exported to {file_path}")
             messagebox.showinfo("Success", f"Data exported to {file_path}")